@@ -0,0 +1,57 @@
+import sys
+import functools
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from collections import OrderedDict
+
+
+CACHE_SIZE = 512 * 2 ** 20
+
+_entries = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+
+
+def metric(func):
+    @functools.wraps(func)
+    def wrapper(*args):
+        key = (st.session_state.conceptarium['version'], func.__name__, args)
+        with _lock:
+            if key in _entries:
+                _entries.move_to_end(key)
+                return _entries[key][0]
+
+        value = func(*args)
+        remember(key, value)
+        return value
+
+    return wrapper
+
+
+def remember(key, value):
+    global _cache_bytes
+    n_bytes = sizeof(value)
+
+    with _lock:
+        if key in _entries:
+            _cache_bytes -= _entries[key][1]
+        _entries[key] = (value, n_bytes)
+        _cache_bytes += n_bytes
+
+        while _cache_bytes > CACHE_SIZE and len(_entries) > 1:
+            _, (_, evicted_bytes) = _entries.popitem(last=False)
+            _cache_bytes -= evicted_bytes
+
+
+def sizeof(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(e) for e in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(e) for e in value.values())
+    return sys.getsizeof(value)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+
+HISTOGRAM_BINS = 50
+
+
+def histogram(values, n_bins=HISTOGRAM_BINS):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return pd.DataFrame(columns=['start', 'end', 'center', 'count'])
+
+    counts, edges = np.histogram(values, bins=n_bins)
+    return pd.DataFrame({
+        'start': edges[:-1],
+        'end': edges[1:],
+        'center': (edges[:-1] + edges[1:]) / 2,
+        'count': counts
+    })
+
+
+def box_stats(values):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {}
+
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    return {
+        'q1': [q1],
+        'median': [median],
+        'q3': [q3],
+        'mean': [np.mean(values)],
+        'lowerfence': [np.min(values[values >= low])],
+        'upperfence': [np.max(values[values <= high])]
+    }
+
+
+def counts(values):
+    values = np.asarray(values, dtype=np.int64)
+    if len(values) == 0:
+        return []
+    return np.bincount(values).tolist()
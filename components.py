@@ -2,7 +2,6 @@ import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import calendar
 import streamlit as st
 from data import *
 
@@ -83,8 +82,8 @@ def birth_rate_subsection():
     col1.plotly_chart(fig)
 
     data = birth_rate_by_day_of_week()
-    fig = px.histogram(data, x='weekday', nbins=12, color_discrete_sequence=['#228b22'], category_orders={
-                       'weekday': calendar.day_abbr[0:7]}, title='birth rate by day of the week')
+    fig = px.bar(data, x='weekday', y='count', color_discrete_sequence=[
+                 '#228b22'], title='birth rate by day of the week')
     fig.update_layout(bargap=0.2)
     fig.update_xaxes(title_text='day of the week')
     fig.update_yaxes(title_text='birth rate')
@@ -95,10 +94,10 @@ def birth_rate_subsection():
     col2.plotly_chart(fig)
 
     data = birth_rate_by_time_of_day()
-    fig = px.histogram(data, nbins=12, color_discrete_sequence=[
-                       '#228b22'], title='birth rate by time of day')
+    fig = px.bar(data, x='time', y='count', color_discrete_sequence=[
+                 '#228b22'], title='birth rate by time of day')
     fig.update_layout(bargap=0.2, showlegend=False)
-    fig.update_xaxes(title_text='time of day', tickformat='%H:%M')
+    fig.update_xaxes(title_text='time of day')
     fig.update_yaxes(title_text='birth rate')
     fig.update_xaxes(showline=True, linewidth=1,
                      linecolor='#474539', mirror=True)
@@ -107,12 +106,11 @@ def birth_rate_subsection():
     col1.plotly_chart(fig)
 
     data = birth_rate_by_time_of_day_and_day_of_week()
-    fig = px.density_heatmap(data, x='weekday', y='time', category_orders={'weekday': calendar.day_abbr[0:7]}, color_continuous_scale=[
-                             '#fffffd', '#228b22'], title='birth rate by day of the week and time of day')
-    fig.update_layout(bargap=0.2, xaxis={'side': 'top'})
+    fig = px.imshow(data, aspect='auto', color_continuous_scale=[
+                    '#fffffd', '#228b22'], title='birth rate by day of the week and time of day')
+    fig.update_layout(xaxis={'side': 'top'})
     fig.update_xaxes(title_text='')
-    fig.update_yaxes(title_text='time of day',
-                     autorange='reversed', tickformat='%H:%M')
+    fig.update_yaxes(title_text='time of day')
     fig.update_xaxes(showline=True, linewidth=1,
                      linecolor='#474539', mirror=True)
     fig.update_yaxes(showline=True, linewidth=1,
@@ -280,9 +278,9 @@ def fitness_subsection():
 
     col1, col2 = st.columns(2)
 
-    data = fitness_distribution()
-    fig = px.histogram(data, nbins=50, color_discrete_sequence=[
-                       '#228b22'], title='fitness distribution')
+    data = fitness_histogram()
+    fig = px.bar(data, x='center', y='count', color_discrete_sequence=[
+                 '#228b22'], title='fitness distribution')
     fig.update_layout(bargap=0.2, showlegend=False)
     fig.update_xaxes(title_text='fitness')
     fig.update_yaxes(title_text='thought count')
@@ -292,9 +290,9 @@ def fitness_subsection():
                      linecolor='#474539', mirror=True)
     col1.plotly_chart(fig)
 
-    data = fitness_distribution()
-    fig = px.box(data, color_discrete_sequence=[
-                 '#228b22'], title='fitness distribution')
+    data = fitness_box()
+    fig = go.Figure(go.Box(**data, name='',
+                    marker_color='#228b22'), layout=dict(title='fitness distribution'))
     fig.update_layout(showlegend=False)
     fig.update_xaxes(title_text='')
     fig.update_yaxes(title_text='fitness')
@@ -304,6 +302,20 @@ def fitness_subsection():
                      linecolor='#474539', mirror=True)
     col2.plotly_chart(fig)
 
+    col1, col2 = st.columns(2)
+
+    data = mean_fitness_per_week()
+    fig = px.line(data, color_discrete_sequence=[
+                  '#228b22'], title='mean fitness per week', line_shape='spline')
+    fig.update_layout(showlegend=False)
+    fig.update_xaxes(title_text='weeks ago', autorange='reversed')
+    fig.update_yaxes(title_text='mean fitness')
+    fig.update_xaxes(showline=True, linewidth=1,
+                     linecolor='#474539', mirror=True)
+    fig.update_yaxes(showline=True, linewidth=1,
+                     linecolor='#474539', mirror=True)
+    col1.plotly_chart(fig)
+
 
 def conciseness_subsection():
     st.markdown('---')
@@ -325,8 +337,8 @@ def conciseness_subsection():
     col1.plotly_chart(fig)
 
     data = conciseness_distribution_over_past_month()
-    fig = px.box(data, color_discrete_sequence=[
-                 '#228b22'], title='conciseness distribution over past month')
+    fig = go.Figure(go.Box(**data, name='',
+                    marker_color='#228b22'), layout=dict(title='conciseness distribution over past month'))
     fig.update_layout(showlegend=False)
     fig.update_xaxes(title_text='')
     fig.update_yaxes(title_text='reading time (seconds)')
@@ -357,8 +369,8 @@ def readability_subsection():
     col1.plotly_chart(fig)
 
     data = readability_distribution_over_past_month()
-    fig = px.box(data, color_discrete_sequence=[
-                 '#228b22'], title='readability distribution over past month')
+    fig = go.Figure(go.Box(**data, name='',
+                    marker_color='#228b22'), layout=dict(title='readability distribution over past month'))
     fig.update_layout(showlegend=False)
     fig.update_xaxes(title_text='')
     fig.update_yaxes(title_text='Flesch-Kincaid grade level')
@@ -390,8 +402,8 @@ def objectivity_subsection():
     col1.plotly_chart(fig)
 
     data = objectivity_distribution_over_past_month()
-    fig = px.box(data, color_discrete_sequence=[
-                 '#228b22'], title='objectivity distribution over past month')
+    fig = go.Figure(go.Box(**data, name='',
+                    marker_color='#228b22'), layout=dict(title='objectivity distribution over past month'))
     fig.update_layout(showlegend=False)
     fig.update_xaxes(title_text='')
     fig.update_yaxes(title_text='objectivity')
@@ -422,8 +434,8 @@ def sentiment_subsection():
     col1.plotly_chart(fig)
 
     data = sentiment_distribution_over_past_month()
-    fig = px.box(data, color_discrete_sequence=[
-                 '#228b22'], title='sentiment distribution over past month')
+    fig = go.Figure(go.Box(**data, name='',
+                    marker_color='#228b22'), layout=dict(title='sentiment distribution over past month'))
     fig.update_layout(showlegend=False)
     fig.update_xaxes(title_text='')
     fig.update_yaxes(title_text='sentiment')
@@ -476,8 +488,11 @@ def projection_subsection():
     col1, col2 = st.columns(2)
 
     data = projection_2d()
+    region = projection_region(col1, data, ['x', 'y'], '2D')
+    data = level_of_detail(data, region, marker_size=6)
     fig = px.scatter(data, x='x', y='y', hover_data=[
                      'modality', 'content'], color_discrete_sequence=['#228b22'], title='2D projection')
+    fig.update_traces(marker_size=data['size'])
     fig.update_layout(showlegend=False, margin=dict(l=0, r=0, b=0))
     fig.update_xaxes(title_text='')
     fig.update_yaxes(title_text='')
@@ -488,8 +503,11 @@ def projection_subsection():
     col1.plotly_chart(fig)
 
     data = projection_3d()
+    region = projection_region(col2, data, ['x', 'y', 'z'], '3D')
+    data = level_of_detail(data, region, marker_size=5)
     fig = px.scatter_3d(data, x='x', y='y', z='z', hover_data=[
-                        'modality', 'content'], size='size', size_max=5, color_discrete_sequence=['#228b22'], title='3D projection')
+                        'modality', 'content'], color_discrete_sequence=['#228b22'], title='3D projection')
+    fig.update_traces(marker_size=data['size'])
     fig.update_layout(showlegend=False, margin=dict(l=0, r=0, b=0))
     fig.update_xaxes(title_text='')
     fig.update_yaxes(title_text='')
@@ -500,6 +518,16 @@ def projection_subsection():
     col2.plotly_chart(fig)
 
 
+def projection_region(col, data, axes, name):
+    expander = col.expander('zoom into ' + name + ' projection')
+    region = {}
+    for axis in axes:
+        low, high = float(data[axis].min()), float(data[axis].max())
+        region[axis] = expander.slider(
+            axis, low, high, (low, high), key=name + axis)
+    return region
+
+
 def discovery_subsection():
     st.markdown('---')
     st.header('🖼️ semantics / 🔭 discovery')
@@ -508,7 +536,8 @@ def discovery_subsection():
 
     col1, col2, col3, col4 = st.columns(4)
 
-    data = [explored_portion_of_semantic_space()]
+    coverage = semantic_space_coverage()
+    data = [explored_portion_of_semantic_space(coverage)]
     data += [discovery_per_thought(data[0]['value'][0])]
     data += [(1 - data[0]['value'][0]) / data[1]]
     data += [(1 - data[0]['value'][0]) / data[0]
@@ -516,6 +545,8 @@ def discovery_subsection():
 
     col1.metric(label='explored proportion of semantic volume',
                 value='{:.3f}'.format(data[0]['value'][0] * 100) + '%')
+    col1.caption('95% CI {:.3f}% – {:.3f}% over {:,} probes'.format(
+        coverage['lower'] * 100, coverage['upper'] * 100, coverage['n_probes']))
     col2.metric(label='mean dicovery rate per thought',
                 value='{:.5f}'.format(data[1] * 100) + '%')
     col3.metric(label='estimated thoughts left for full coverage',
@@ -0,0 +1,108 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from time import time as now
+
+
+PROBE_BLOCK = 4096
+PROBE_ROUND = PROBE_BLOCK * 8
+MEMORY_LIMIT = 256 * 2 ** 20
+
+_embeddings = None
+
+
+def sample_probes(entropy, block_idx, n_probes, n_dims):
+    seed = np.random.SeedSequence(entropy, spawn_key=(block_idx,))
+    rng = np.random.default_rng(seed)
+    probes = rng.standard_normal((n_probes, n_dims), dtype=np.float32)
+    probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+    return probes
+
+
+def block_sizes(n_probes, first_block=0):
+    n_blocks = -(-n_probes // PROBE_BLOCK)
+    sizes = [PROBE_BLOCK] * n_blocks
+    if n_blocks > 0:
+        sizes[-1] = n_probes - PROBE_BLOCK * (n_blocks - 1)
+    return list(enumerate(sizes, start=first_block))
+
+
+def any_above(embeddings, probes, threshold, memory_limit=MEMORY_LIMIT):
+    tile_size = max(1, memory_limit // (probes.itemsize * len(probes)))
+    hits = np.zeros(len(probes), dtype=bool)
+
+    for start in range(0, len(embeddings), tile_size):
+        pending = np.flatnonzero(~hits)
+        if len(pending) == 0:
+            break
+        similarities = np.dot(probes[pending],
+                              embeddings[start:start + tile_size].T)
+        hits[pending] = np.any(similarities > threshold, axis=1)
+
+    return hits
+
+
+def count_block_hits(embeddings, entropy, block_idx, n_probes, threshold, memory_limit):
+    probes = sample_probes(entropy, block_idx, n_probes, embeddings.shape[1])
+    return np.count_nonzero(any_above(embeddings, probes, threshold, memory_limit))
+
+
+def _init_worker(embeddings):
+    global _embeddings
+    _embeddings = embeddings
+
+
+def _count_block_hits(args):
+    return count_block_hits(_embeddings, *args)
+
+
+def count_hits(embeddings, n_probes, threshold=0.19, seed=None, memory_limit=MEMORY_LIMIT, n_workers=1, first_block=0):
+    entropy = np.random.SeedSequence(seed).entropy
+    tasks = [(entropy, block_idx, block_size, threshold, memory_limit)
+             for block_idx, block_size in block_sizes(n_probes, first_block)]
+
+    if n_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(embeddings,)) as executor:
+            return sum(executor.map(_count_block_hits, tasks))
+
+    return sum(count_block_hits(embeddings, *e) for e in tasks)
+
+
+def wilson_interval(hits, n_probes, confidence=0.95):
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    hitrate = hits / n_probes
+    center = (hitrate + z ** 2 / (2 * n_probes)) / (1 + z ** 2 / n_probes)
+    margin = z / (1 + z ** 2 / n_probes) * \
+        np.sqrt(hitrate * (1 - hitrate) / n_probes + z ** 2 / (4 * n_probes ** 2))
+    return max(0, center - margin), min(1, center + margin)
+
+
+def estimate_coverage(embeddings, threshold=0.19, relative_error=0.05, time_budget=None, confidence=0.95, max_probes=500000, seed=None, **kwargs):
+    if max_probes <= 0:
+        raise ValueError('max_probes must be positive')
+
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    entropy = np.random.SeedSequence(seed).entropy
+    start = now()
+    hits = 0
+    n_probes = 0
+
+    while n_probes < max_probes:
+        round_size = min(PROBE_ROUND, max_probes - n_probes)
+        hits += count_hits(embeddings, round_size, threshold=threshold, seed=entropy,
+                           first_block=n_probes // PROBE_BLOCK, **kwargs)
+        n_probes += round_size
+        lower, upper = wilson_interval(hits, n_probes, confidence)
+
+        if relative_error is not None and hits > 0 and \
+                (upper - lower) / 2 <= relative_error * hits / n_probes:
+            break
+        if time_budget is not None and now() - start >= time_budget:
+            break
+
+    return {
+        'estimate': hits / n_probes,
+        'lower': lower,
+        'upper': upper,
+        'n_probes': n_probes
+    }
@@ -3,14 +3,22 @@ import streamlit as st
 import requests
 import pandas as pd
 from time import time as now
-from datetime import datetime, date, time
+from datetime import datetime, time
 import math
-from util import cos_dist, sample_spherical, syllable_count
-import re
-from textblob import TextBlob
-from collections import Counter
-from sklearn.manifold import TSNE
-from sklearn.decomposition import PCA
+import calendar
+from dateutil.tz import tzlocal
+from util import segment_sums, segment_means, segment_stats, consecutive_cos_dist
+from linguistics import linguistic_features, fold_interests, load_interests, save_interests, readability, weighted_mean
+from coverage import estimate_coverage
+from charts import histogram, box_stats, counts
+from cache import metric
+from store import build_store, activations, stream_thoughts, merge_store, reconcile, load_snapshot, save_snapshot, snapshot_path, watermark, size, contents, buckets, TEXT, IMAGE, WEEK, MONTH, SNAPSHOT_TTL, FULL_SYNC_INTERVAL
+from projection import basis, reduce, project
+
+
+HOVER_LENGTH = 280
+LOD_POINTS = 4000
+FITNESS_BLOCK = 16
 
 
 def fetch_conceptarium():
@@ -21,120 +29,157 @@ def fetch_conceptarium():
         conceptarium_url = conceptarium_url[:-1]
 
     conceptarium_url += ':8000/find'
-    conceptarium = requests.get(conceptarium_url, params={
+    path = snapshot_path(conceptarium_url, st.session_state['access_token'])
+    st.session_state['snapshot_path'] = path
+    conceptarium = load_snapshot(path)
+
+    if conceptarium is None or now() - conceptarium['full_synced_at'] > FULL_SYNC_INTERVAL:
+        conceptarium = build_store(find_thoughts(conceptarium_url))
+        save_snapshot(conceptarium, path)
+    elif now() - conceptarium['fetched_at'] > SNAPSHOT_TTL:
+        conceptarium = merge_store(conceptarium, find_thoughts(
+            conceptarium_url, since=watermark(conceptarium)))
+        conceptarium = reconcile(conceptarium, find_thoughts(
+            conceptarium_url, embeddings=False))
+        if conceptarium is None:
+            conceptarium = build_store(find_thoughts(conceptarium_url))
+        save_snapshot(conceptarium, path)
+
+    st.session_state['conceptarium'] = conceptarium
+
+
+def find_thoughts(conceptarium_url, since=None, embeddings=True):
+    params = {
         'query': '',
-        'return_embeddings': True
-    }, headers={
-        'authorization': 'Bearer ' + st.session_state['access_token']
-    }).json()
-    conceptarium = conceptarium['authorized_thoughts']
+        'return_embeddings': embeddings
+    }
+    if since is not None:
+        params['since'] = since
 
-    for e_idx, e in enumerate(conceptarium):
-        conceptarium[e_idx]['embedding'] = conceptarium[e_idx]['embeddings']['text_image']
-        conceptarium[e_idx]['activation'] = np.log(e['interest'] / (1 - 0.9)) - \
-            0.9 * np.log((now() - e['timestamp']) / (3600 * 24) + 0.1)
-
-    st.session_state['conceptarium_json'] = conceptarium
+    response = requests.get(conceptarium_url, params=params, headers={
+        'authorization': 'Bearer ' + st.session_state['access_token']
+    }, stream=True)
+    response.raise_for_status()
+    return stream_thoughts(response.iter_content(chunk_size=2 ** 20))
 
 
+@metric
 def birth_rate_over_past_day():
-    data = daily_birth_rate()
-    return data[0], data[0] - data[1]
+    return birth_rate_over_past(1)
 
 
+@metric
 def birth_rate_over_past_week():
-    data = daily_birth_rate()
-    return sum(data[:7]), sum(data[:7]) - sum(data[7:14])
+    return birth_rate_over_past(7)
 
 
+@metric
 def birth_rate_over_past_month():
-    data = daily_birth_rate()
-    return sum(data[:30]), sum(data[:30]) - sum(data[30:60])
+    return birth_rate_over_past(30)
 
 
+@metric
 def birth_rate_over_past_year():
+    return birth_rate_over_past(365)
+
+
+def birth_rate_over_past(days):
+    cumulative = cumulative_birth_rate()
+    current = births_between(cumulative, 0, days)
+    return current, current - births_between(cumulative, days, 2 * days)
+
+
+def births_between(cumulative, start, end):
+    return int(cumulative[min(end, len(cumulative) - 1)] - cumulative[min(start, len(cumulative) - 1)])
+
+
+@metric
+def cumulative_birth_rate():
     data = daily_birth_rate()
-    return sum(data[:365]), sum(data[:365]) - sum(data[365:2 * 365])
+    cumulative = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum(data, out=cumulative[1:])
+    return cumulative
 
 
+@metric
 def daily_birth_rate():
-    conceptarium = st.session_state.conceptarium_json
-    timestamps = pd.DataFrame(conceptarium)['timestamp'].values
+    conceptarium = st.session_state.conceptarium
+    timestamps = conceptarium['timestamps']
     midnight = datetime.combine(datetime.today(), time.min).timestamp()
 
-    timestamps = [midnight - e for e in timestamps]
-    timestamps = [int(1 + e / (60 * 60 * 24)) for e in timestamps]
-    timestamps = sorted(timestamps)
-    data = [timestamps.count(e) for e in range(max(timestamps) + 1)]
-    return data
+    days = (1 + (midnight - timestamps) / (60 * 60 * 24)).astype(int)
+    data = np.bincount(days[days >= 0])
+    return data.tolist()
 
 
-def birth_rate_by_day_of_week():
-    conceptarium = st.session_state.conceptarium_json
-    timestamps = pd.DataFrame(conceptarium)['timestamp'].values
+@metric
+def calendar_features():
+    conceptarium = st.session_state.conceptarium
+    moments = pd.to_datetime(
+        conceptarium['timestamps'], unit='s', utc=True).tz_convert(tzlocal())
 
-    data = [date.fromtimestamp(e).strftime('%a') for e in timestamps]
-    return pd.DataFrame(data, columns=['weekday'])
+    return pd.DataFrame({
+        'hour': moments.hour.values.astype(np.int8),
+        'minute': moments.minute.values.astype(np.int8),
+        'weekday': moments.weekday.values.astype(np.int8)
+    })
 
 
-def birth_rate_by_time_of_day():
-    conceptarium = st.session_state.conceptarium_json
-    timestamps = pd.DataFrame(conceptarium)['timestamp'].values
+@metric
+def birth_rate_by_day_of_week():
+    features = calendar_features()
+    counts = np.bincount(features['weekday'], minlength=7)
+    return pd.DataFrame({'weekday': list(calendar.day_abbr), 'count': counts})
 
-    data = [datetime.fromtimestamp(e, tz=datetime.now(
-    ).astimezone().tzinfo).strftime('%H:%M') for e in timestamps]
-    data = pd.to_datetime(data, format='%H:%M')
-    return pd.DataFrame(data, columns=['time'])
 
+@metric
+def birth_rate_by_time_of_day(n_bins=12):
+    features = calendar_features()
+    counts = np.bincount(time_of_day_bins(features, n_bins), minlength=n_bins)
+    return pd.DataFrame({'time': time_of_day_labels(n_bins), 'count': counts})
 
-def birth_rate_by_time_of_day_and_day_of_week():
-    time = birth_rate_by_time_of_day()
-    weekday = birth_rate_by_day_of_week()
 
-    data = pd.DataFrame()
-    data['time'] = time['time'].values
-    data['weekday'] = weekday['weekday'].values
-    return data
+@metric
+def birth_rate_by_time_of_day_and_day_of_week(n_bins=24):
+    features = calendar_features()
+    cells = time_of_day_bins(features, n_bins) * 7 + features['weekday'].values
+    counts = np.bincount(cells, minlength=n_bins * 7).reshape(n_bins, 7)
+    return pd.DataFrame(counts, index=time_of_day_labels(n_bins), columns=list(calendar.day_abbr))
 
 
-def population_size_per_day():
-    data = daily_birth_rate()
-    data = [sum(data[e:]) for e in range(len(data))]
-    return data
+def time_of_day_bins(features, n_bins):
+    minutes = features['hour'].values.astype(int) * 60 + features['minute'].values
+    return minutes * n_bins // (24 * 60)
 
 
-def population_pyramid_of_fittest_quartile():
-    conceptarium = st.session_state.conceptarium_json
-    conceptarium = sorted(conceptarium, key=lambda x: x['activation'])
-    fittest = conceptarium[:math.ceil(len(conceptarium) * 0.25)]
+def time_of_day_labels(n_bins):
+    return ['{:02d}:{:02d}'.format(*divmod(e * 24 * 60 // n_bins, 60)) for e in range(n_bins)]
+
 
-    fittest_text = [e for e in fittest if e['modality'] == 'text']
-    fittest_imagery = [e for e in fittest if e['modality'] == 'image']
+@metric
+def population_size_per_day():
+    data = np.cumsum(daily_birth_rate()[::-1])[::-1]
+    return data.tolist()
 
-    if len(fittest_text) > 0:
-        fittest_text_age = [
-            int((now() - e['timestamp']) / (60 * 60 * 24 * 7)) for e in fittest_text]
-        fittest_text_age = [fittest_text_age.count(
-            e) for e in range(max(fittest_text_age) + 1)]
-    else:
-        fittest_text_age = []
 
-    if len(fittest_imagery) > 0:
-        fittest_imagery_age = [
-            int((now() - e['timestamp']) / (60 * 60 * 24 * 7)) for e in fittest_imagery]
-        fittest_imagery_age = [fittest_imagery_age.count(
-            e) for e in range(max(fittest_imagery_age) + 1)]
-    else:
-        fittest_imagery_age = []
+@metric
+def population_pyramid_of_fittest_quartile():
+    conceptarium = st.session_state.conceptarium
+    fittest = fitness_index()['fittest']
 
-    return fittest_text_age, fittest_imagery_age
+    modalities = conceptarium['modalities'][fittest]
+    ages = ((now() - conceptarium['timestamps'][fittest]) /
+            (60 * 60 * 24 * 7)).astype(int)
+    return counts(ages[modalities == TEXT]), counts(ages[modalities == IMAGE])
 
 
+@metric
 def variability_over_past_week():
     data = variability_per_week()['variability']
     return round(data[0], 2), round(data[0] - data[1], 2)
 
 
+@metric
 def variability_over_past_month():
     data = variability_per_month()['variability']
     if len(data) < 2:
@@ -143,75 +188,54 @@ def variability_over_past_month():
     return round(data[0], 2), round(data[0] - data[1], 2)
 
 
+@metric
 def aggregate_variability():
-    conceptarium = st.session_state.conceptarium_json
-    embeddings = [e['embedding'] for e in conceptarium]
-    centroid = np.mean(embeddings, axis=0)
-    return round(np.mean([cos_dist(e, centroid) for e in embeddings]) * 100, 2)
+    conceptarium = st.session_state.conceptarium
+    _, dispersions, _ = segment_stats(conceptarium['embeddings'], np.array(
+        [0, size(conceptarium)]), conceptarium['norms'])
+    return round(dispersions[0] * 100, 2)
 
 
+@metric
 def variability_of_fittest_quartile():
-    conceptarium = st.session_state.conceptarium_json
-    conceptarium = sorted(conceptarium, key=lambda x: x['activation'])
-    fittest = conceptarium[: math.ceil(len(conceptarium) * 0.25)]
-    embeddings = [e['embedding'] for e in fittest]
-    centroid = np.mean(embeddings, axis=0)
-    return round(np.mean([cos_dist(e, centroid) for e in embeddings]) * 100, 2)
+    conceptarium = st.session_state.conceptarium
+    fittest = fitness_index()['fittest']
+    _, dispersions, _ = segment_stats(conceptarium['embeddings'][fittest], np.array(
+        [0, len(fittest)]), conceptarium['norms'][fittest])
+    return round(dispersions[0] * 100, 2)
 
 
+@metric
 def variability_per_week():
-    conceptarium = st.session_state.conceptarium_json
-
-    for thought_idx, thought in enumerate(conceptarium):
-        conceptarium[thought_idx]['age'] = int(
-            (now() - thought['timestamp']) / (60 * 60 * 24 * 7))
-
-    max_age = max([e['age'] for e in conceptarium]) + 1
-    variabilities = [0] * max_age
-
-    for age in range(max_age):
-        thoughts = [e for e in conceptarium if e['age'] == age]
-        if len(thoughts) > 1:
-            embeddings = [e['embedding'] for e in thoughts]
-            centroid = np.mean(embeddings, axis=0)
-            variabilities[age] = np.mean(
-                [cos_dist(e, centroid) for e in embeddings]) * 100
-
-    data = pd.DataFrame()
-    data['age'] = [e for e in range(max_age) if variabilities[e] != 0]
-    data['variability'] = [e for e in variabilities if e != 0]
-    return data
+    return variability_per_period(WEEK)
 
 
+@metric
 def variability_per_month():
-    conceptarium = st.session_state.conceptarium_json
+    return variability_per_period(MONTH)
 
-    for thought_idx, thought in enumerate(conceptarium):
-        conceptarium[thought_idx]['age'] = int(
-            (now() - thought['timestamp']) / (60 * 60 * 24 * 30))
 
-    max_age = max([e['age'] for e in conceptarium]) + 1
-    variabilities = [0] * max_age
-
-    for age in range(max_age):
-        thoughts = [e for e in conceptarium if e['age'] == age]
-        if len(thoughts) > 1:
-            embeddings = [e['embedding'] for e in thoughts]
-            centroid = np.mean(embeddings, axis=0)
-            variabilities[age] = np.mean(
-                [cos_dist(e, centroid) for e in embeddings]) * 100
+@metric
+def variability_per_period(period):
+    conceptarium = st.session_state.conceptarium
+    bounds = buckets(conceptarium, period)
+    _, dispersions, counts = segment_stats(
+        conceptarium['embeddings'], bounds, conceptarium['norms'])
+    variabilities = np.where(counts > 1, dispersions * 100, 0)
 
     data = pd.DataFrame()
-    data['age'] = [e for e in range(max_age) if variabilities[e] != 0]
-    data['variability'] = [e for e in variabilities if e != 0]
+    data['age'] = np.flatnonzero(variabilities != 0)
+    data['variability'] = variabilities[variabilities != 0]
     return data
 
 
+@metric
 def drift_over_past_week():
     data = drift_per_week()
     return round(data[0], 2), round(data[0] - data[1], 2)
 
 
+@metric
 def drift_over_past_week_percent_of_max():
     data = drift_per_week()
     percent_of_max_past_week = round(data[0] / max(data), 2) * 100
@@ -219,6 +243,7 @@ def drift_over_past_week_percent_of_max():
     return str(percent_of_max_past_week) + '%', str(round(percent_of_max_past_week - percent_of_max_previous_week, 2)) + '%'
 
 
+@metric
 def drift_over_past_month():
     data = drift_per_month()
     if len(data) < 2:
@@ -226,6 +251,7 @@ def drift_over_past_month():
     return round(data[0], 2), round(data[0] - data[1], 2)
 
 
+@metric
 def drift_over_past_month_percent_of_max():
     data = drift_per_month()
     percent_of_max_past_week = round(data[0] / max(data), 2) * 100
@@ -237,303 +263,319 @@ def drift_over_past_month_percent_of_max():
     return str(percent_of_max_past_week) + '%', str(percent_of_max_past_week - percent_of_max_previous_week) + '%'
 
 
+@metric
 def drift_per_week():
-    conceptarium = st.session_state.conceptarium_json
-
-    for thought_idx, thought in enumerate(conceptarium):
-        conceptarium[thought_idx]['age'] = int(
-            (now() - thought['timestamp']) / (60 * 60 * 24 * 7))
+    return drift_per_period(WEEK)
 
-    max_age = max([e['age'] for e in conceptarium]) + 1
-    centroids = [0] * max_age
 
-    for age in range(max_age):
-        thoughts = [e for e in conceptarium if e['age'] == age]
-        embeddings = [e['embedding'] for e in thoughts]
-        centroids[age] = np.mean(embeddings, axis=0)
-
-    drifts = [cos_dist(centroids[e], centroids[e + 1])
-              * 100 for e in range(max_age - 1)]
-    return drifts
+@metric
+def drift_per_month():
+    return drift_per_period(MONTH)
 
 
-def drift_per_month():
-    conceptarium = st.session_state.conceptarium_json
+@metric
+def drift_per_period(period):
+    conceptarium = st.session_state.conceptarium
+    bounds = buckets(conceptarium, period)
+    centroids = segment_means(conceptarium['embeddings'], bounds)
 
-    for thought_idx, thought in enumerate(conceptarium):
-        conceptarium[thought_idx]['age'] = int(
-            (now() - thought['timestamp']) / (60 * 60 * 24 * 30))
+    drifts = consecutive_cos_dist(centroids) * 100
+    return drifts.tolist()
 
-    max_age = max([e['age'] for e in conceptarium]) + 1
-    centroids = [0] * max_age
 
-    for age in range(max_age):
-        thoughts = [e for e in conceptarium if e['age'] == age]
-        embeddings = [e['embedding'] for e in thoughts]
-        centroids[age] = np.mean(embeddings, axis=0)
+@metric
+def mean_fitness_per_week():
+    conceptarium = st.session_state.conceptarium
+    reference = now()
+    n_weeks = int((reference - np.min(conceptarium['timestamps'])) / WEEK) + 1 \
+        if size(conceptarium) else 0
+    references = reference - WEEK * np.arange(n_weeks)
+    data = np.zeros(n_weeks)
 
-    drifts = [cos_dist(centroids[e], centroids[e + 1])
-              * 100 for e in range(max_age - 1)]
-    return drifts
+    for start in range(0, n_weeks, FITNESS_BLOCK):
+        block = references[start:start + FITNESS_BLOCK]
+        with np.errstate(invalid='ignore'):
+            values = activations(conceptarium, block)
+        born = conceptarium['timestamps'] <= block[:, None]
+        data[start:start + FITNESS_BLOCK] = np.sum(np.where(born, values, 0), axis=1) / \
+            np.maximum(1, np.sum(born, axis=1))
+    return data.tolist()
 
 
+@metric
 def mean_fitness():
     data = fitness_distribution()
     data = round(np.mean(data), 2)
     return data
 
 
+@metric
 def fitness_interquartile_mean():
-    data = fitness_distribution()
-    q1, q3 = np.percentile(data, [25, 75])
-    data = [e for e in data if q1 <= e and e <= q3]
-    data = np.mean(data)
+    index = fitness_index()
+    data = np.mean(index['activations'][index['interquartile']])
     return round(data, 2)
 
 
+@metric
 def fitness_interquartile_range():
-    data = fitness_distribution()
-    q1, q3 = np.percentile(data, [25, 75])
-    return round(q3 - q1, 2)
+    index = fitness_index()
+    return round(index['q3'] - index['q1'], 2)
 
 
+@metric
 def memetic_load():
     data = fitness_distribution()
     data = round((np.max(data) - np.mean(data)) / np.max(data), 2)
     return data
 
 
+@metric
 def fitness_distribution():
-    conceptarium = st.session_state.conceptarium_json
-    data = [e['activation'] for e in conceptarium]
+    conceptarium = st.session_state.conceptarium
+    data = conceptarium['activations']
     return data
 
 
-def conciseness_per_week():
-    conceptarium = st.session_state.conceptarium_json
-    for thought_idx, thought in enumerate(conceptarium):
-        conceptarium[thought_idx]['age'] = int(
-            (now() - thought['timestamp']) / (60 * 60 * 24 * 7))
+@metric
+def fitness_index():
+    data = fitness_distribution()
+    n_fittest = math.ceil(len(data) * 0.25)
+    fittest = np.argpartition(-data, n_fittest - 1)[:n_fittest] \
+        if n_fittest > 0 else np.arange(0)
+    q1, q3 = np.percentile(data, [25, 75]) if len(data) else (np.nan, np.nan)
 
-    max_age = max([e['age'] for e in conceptarium]) + 1
-    data = [0] * max_age
+    return {
+        'activations': data,
+        'fittest': np.sort(fittest),
+        'q1': q1,
+        'q3': q3,
+        'interquartile': (q1 <= data) & (data <= q3)
+    }
 
-    for age in range(max_age):
-        thoughts = [e for e in conceptarium if e['age'] == age]
-        lengths = [len(e['content'].split(' ')) / 130 *
-                   60 for e in thoughts if e['modality'] == 'text']
-        data[age] = np.mean(lengths)
 
-    return data
+@metric
+def fitness_histogram():
+    return histogram(fitness_distribution())
 
 
-def conciseness_distribution_over_past_month():
-    conceptarium = st.session_state.conceptarium_json
-    thoughts = [e for e in conceptarium if int(
-        (now() - e['timestamp']) / (60 * 60 * 24 * 30)) < 1]
-    data = [len(e['content'].split(' ')) / 130 *
-            60 for e in thoughts if e['modality'] == 'text']
-    return data
+@metric
+def fitness_box():
+    return box_stats(fitness_distribution())
 
 
-def readability_per_week():
-    conceptarium = st.session_state.conceptarium_json
-    for thought_idx, thought in enumerate(conceptarium):
-        conceptarium[thought_idx]['age'] = int(
-            (now() - thought['timestamp']) / (60 * 60 * 24 * 7))
-
-    max_age = max([e['age'] for e in conceptarium]) + 1
-    data = [0] * max_age
-
-    for age in range(max_age):
-        thoughts = [e for e in conceptarium if e['age']
-                    == age and e['modality'] == 'text']
-        text = ' '.join([e['content'] for e in thoughts])
-        blob = TextBlob(text)
-        asl = len(blob.words) / len(blob.sentences)
-        asw = np.mean([syllable_count(e) for e in text.split(
-            ' ') if len(re.split(r'[.!?]+', e)) == 1 and len(e) > 0])
-        data[age] = 0.39 * asl + 11.8 * asw - 15.59
+@metric
+def text_features():
+    conceptarium = st.session_state.conceptarium
+    return linguistic_features(conceptarium)
 
-    return data
 
+def text_features_per_week(*names):
+    conceptarium = st.session_state.conceptarium
+    features = text_features()
+    bounds = buckets(conceptarium, WEEK)
+    values = np.column_stack([features[e] for e in names])
+    return segment_sums(values, bounds).T
 
-def readability_distribution_over_past_month():
-    conceptarium = st.session_state.conceptarium_json
-    thoughts = [e for e in conceptarium if int(
-        (now() - e['timestamp']) / (60 * 60 * 24 * 30)) < 1 and e['modality'] == 'text']
-    data = [0] * len(thoughts)
-
-    for thought_idx, thought in enumerate(thoughts):
-        text = thought['content']
-        blob = TextBlob(text)
-        asl = len(blob.words) / len(blob.sentences)
-        asw = np.mean([syllable_count(e) for e in text.split(
-            ' ') if len(re.split(r'[.!?]+', e)) == 1 and len(e) > 0])
-        data[thought_idx] = 0.39 * asl + 11.8 * asw - 15.59
 
-    return data
+def text_thoughts_over_past_month():
+    conceptarium = st.session_state.conceptarium
+    return np.flatnonzero((((now() - conceptarium['timestamps']) / MONTH).astype(int) < 1)
+                          & (conceptarium['modalities'] == TEXT))
 
 
-def objectivity_per_week():
-    conceptarium = st.session_state.conceptarium_json
-    for thought_idx, thought in enumerate(conceptarium):
-        conceptarium[thought_idx]['age'] = int(
-            (now() - thought['timestamp']) / (60 * 60 * 24 * 7))
+@metric
+def conciseness_per_week():
+    lengths, counts = text_features_per_week('length', 'text')
+    data = weighted_mean(lengths / 130 * 60, counts, np.nan)
+    return data.tolist()
 
-    max_age = max([e['age'] for e in conceptarium]) + 1
-    data = [0] * max_age
 
-    for age in range(max_age):
-        thoughts = [e for e in conceptarium if e['age']
-                    == age and e['modality'] == 'text']
-        text = TextBlob(' '.join([e['content'] for e in thoughts]))
-        data[age] = 1 - text.sentiment[1]
+@metric
+def conciseness_distribution_over_past_month():
+    features = text_features()
+    data = features['length'][text_thoughts_over_past_month()] / 130 * 60
+    return box_stats(data)
 
-    return data
 
+@metric
+def readability_per_week():
+    data = readability(*text_features_per_week('words',
+                       'sentences', 'syllables', 'tokens'))
+    return data.tolist()
 
-def objectivity_distribution_over_past_month():
-    conceptarium = st.session_state.conceptarium_json
-    thoughts = [e for e in conceptarium if int(
-        (now() - e['timestamp']) / (60 * 60 * 24 * 30)) < 1 and e['modality'] == 'text']
-    data = [0] * len(thoughts)
 
-    for thought_idx, thought in enumerate(thoughts):
-        text = TextBlob(thought['content'])
-        data[thought_idx] = 1 - text.sentiment[1]
+@metric
+def readability_distribution_over_past_month():
+    features = text_features()
+    thoughts = text_thoughts_over_past_month()
+    data = readability(*[features[e][thoughts]
+                       for e in ['words', 'sentences', 'syllables', 'tokens']])
+    return box_stats(data)
 
-    return data
 
+@metric
+def objectivity_per_week():
+    subjectivities, assessments = text_features_per_week(
+        'weighted_subjectivity', 'assessments')
+    data = 1 - weighted_mean(subjectivities, assessments)
+    return data.tolist()
 
-def sentiment_per_week():
-    conceptarium = st.session_state.conceptarium_json
-    for thought_idx, thought in enumerate(conceptarium):
-        conceptarium[thought_idx]['age'] = int(
-            (now() - thought['timestamp']) / (60 * 60 * 24 * 7))
 
-    max_age = max([e['age'] for e in conceptarium]) + 1
-    data = [0] * max_age
+@metric
+def objectivity_distribution_over_past_month():
+    features = text_features()
+    data = 1 - features['subjectivity'][text_thoughts_over_past_month()]
+    return box_stats(data)
 
-    for age in range(max_age):
-        thoughts = [e for e in conceptarium if e['age']
-                    == age and e['modality'] == 'text']
-        text = TextBlob(' '.join([e['content'] for e in thoughts]))
-        data[age] = text.sentiment[0]
 
-    return data
+@metric
+def sentiment_per_week():
+    polarities, assessments = text_features_per_week(
+        'weighted_polarity', 'assessments')
+    data = weighted_mean(polarities, assessments)
+    return data.tolist()
 
 
+@metric
 def sentiment_distribution_over_past_month():
-    conceptarium = st.session_state.conceptarium_json
-    thoughts = [e for e in conceptarium if int(
-        (now() - e['timestamp']) / (60 * 60 * 24 * 30)) < 1 and e['modality'] == 'text']
-    data = [0] * len(thoughts)
+    features = text_features()
+    data = features['polarity'][text_thoughts_over_past_month()]
+    return box_stats(data)
 
-    for thought_idx, thought in enumerate(thoughts):
-        text = TextBlob(thought['content'])
-        data[thought_idx] = text.sentiment[0]
 
-    return data
+@metric
+def interests_index():
+    conceptarium = st.session_state.conceptarium
+    path = st.session_state['snapshot_path'] + '.interests.json'
+    state = fold_interests(conceptarium, text_features(), load_interests(path))
+    save_interests(path, state)
+    return state['keywords']
 
 
+@metric
 def interests():
-    conceptarium = st.session_state.conceptarium_json
-    text_thoughts = [
-        e for e in conceptarium if e['modality'] == 'text']
-    text_thoughts = sorted(text_thoughts, key=lambda x: x['timestamp'])
-    text = ' '.join([e['content'] for e in text_thoughts])
-    text = TextBlob(text.lower())
-    keywords = text.noun_phrases
-    keywords = [e.singularize() for e in keywords]
-    keywords = Counter(keywords)
-    keywords = [e for e in keywords.keys() if keywords[e] > 2]
-    data = pd.DataFrame(columns=['keyword', 'start', 'end', 'count'])
-
-    for keyword in keywords:
-        instances = [e for e in text_thoughts if keyword in e['content']]
-        if len(instances) > 0:
-            start = datetime.fromtimestamp(
-                instances[0]['timestamp']).strftime('%Y-%m-%d')
-            end = datetime.fromtimestamp(
-                instances[-1]['timestamp']).strftime('%Y-%m-%d')
-            if start == end:
-                end = datetime.fromtimestamp(
-                    instances[-1]['timestamp'] + (60 * 60 * 24)).strftime('%Y-%m-%d')
-            data.loc[len(data.index)] = [keyword, start, end, len(instances)]
-
+    index = interests_index()
+    keywords = [e for e, (occurrences, *_) in index.items() if occurrences > 2]
+    first = [index[e][2] for e in keywords]
+    last = [index[e][3] for e in keywords]
+
+    start = [datetime.fromtimestamp(e).strftime('%Y-%m-%d') for e in first]
+    end = [datetime.fromtimestamp(e).strftime('%Y-%m-%d') for e in last]
+    end = [datetime.fromtimestamp(e_last + (60 * 60 * 24)).strftime('%Y-%m-%d') if e_start == e_end else e_end
+           for e_start, e_end, e_last in zip(start, end, last)]
+
+    data = pd.DataFrame({
+        'keyword': keywords,
+        'start': start,
+        'end': end,
+        'count': [index[e][1] for e in keywords]
+    }, columns=['keyword', 'start', 'end', 'count'])
     data = data.sort_values(by='start')
     return data
 
 
-def projection_2d():
-    conceptarium = st.session_state.conceptarium_json
-    thoughts = [e for e in conceptarium if e['modality'] == 'text']
-    embeddings = [e['embedding'] for e in thoughts]
-    reducer = TSNE(2)
-    embeddings_2d = reducer.fit_transform(embeddings)
-    data = [[*emb, thoughts[emb_idx]['modality']]
-            for emb_idx, emb in enumerate(embeddings_2d)]
-    data = [e + ['*image*'] if e[2] == 'image' else e +
-            [thoughts[e_idx]['content']] for e_idx, e in enumerate(data)]
-    data = pd.DataFrame(data, columns=['x', 'y', 'modality', 'content'])
-    data.content = data.content.str.wrap(40)
-    data.content = data.content.apply(lambda x: x.replace('\n', '<br>'))
-    return data
+@metric
+def semantic_basis():
+    conceptarium = st.session_state.conceptarium
+    return basis(conceptarium['embeddings'], conceptarium['ids'],
+                 st.session_state['snapshot_path'] + '.basis.npz')
 
 
-def projection_3d():
-    conceptarium = st.session_state.conceptarium_json
-    thoughts = [e for e in conceptarium if e['modality'] == 'text']
-    embeddings = [e['embedding'] for e in thoughts]
-    reducer = TSNE(3)
-    embeddings_3d = reducer.fit_transform(embeddings)
-    data = [[*emb, thoughts[emb_idx]['modality']]
-            for emb_idx, emb in enumerate(embeddings_3d)]
-    data = [e + ['*image*'] if conceptarium[e_idx]['modality'] ==
-            'image' else e + [thoughts[e_idx]['content']] for e_idx, e in enumerate(data)]
-    data = [e + [3] for e in data]
-    data = pd.DataFrame(
-        data, columns=['x', 'y', 'z', 'modality', 'content', 'size'])
-    data.content = data.content.str.wrap(40)
-    data.content = data.content.apply(lambda x: x.replace('\n', '<br>'))
+@metric
+def projection_basis():
+    conceptarium = st.session_state.conceptarium
+    thoughts = np.flatnonzero(conceptarium['modalities'] == TEXT)
+    return thoughts, reduce(conceptarium['embeddings'][thoughts], semantic_basis())
+
+
+def projection(n_components):
+    conceptarium = st.session_state.conceptarium
+    thoughts, reduced = projection_basis()
+    coordinates = project(reduced, conceptarium['ids'][thoughts], n_components,
+                          st.session_state['snapshot_path'] + '.projections')
+
+    data = pd.DataFrame(coordinates, columns=['x', 'y', 'z'][:n_components])
+    data['modality'] = 'text'
+    data['content'] = hover_text(contents(conceptarium, thoughts))
     return data
 
 
+@metric
+def projection_2d():
+    return projection(2)
+
+
+@metric
+def projection_3d():
+    return projection(3)
+
+
+def hover_text(texts, length=HOVER_LENGTH):
+    data = pd.Series([e if len(e) <= length else e[:length] + '…' for e in texts], dtype=object)
+    data = data.str.wrap(40)
+    data = data.apply(lambda x: x.replace('\n', '<br>'))
+    return data.values
+
+
+def level_of_detail(data, region, marker_size, max_points=LOD_POINTS):
+    axes = list(region)
+    low = np.array([region[e][0] for e in axes])
+    high = np.array([region[e][1] for e in axes])
+    coordinates = data[axes].to_numpy()
+    inside = np.all((coordinates >= low) & (coordinates <= high), axis=1)
+    data = data[inside]
+    coordinates = coordinates[inside]
+
+    if len(data) <= max_points:
+        return data.assign(size=marker_size)
+
+    cells = int(max_points ** (1 / len(axes)))
+    voxels = np.clip(((coordinates - low) / np.maximum(high - low, 1e-12)
+                     * cells).astype(int), 0, cells - 1)
+    voxels = np.ravel_multi_index(voxels.T, (cells,) * len(axes))
+    _, first, members, counts = np.unique(
+        voxels, return_index=True, return_inverse=True, return_counts=True)
+
+    aggregates = pd.DataFrame({
+        e: np.bincount(members, weights=coordinates[:, e_idx]) / counts
+        for e_idx, e in enumerate(axes)})
+    aggregates['modality'] = 'text'
+    aggregates['content'] = [content if count == 1 else str(count) + ' thoughts, e.g.<br>' + content
+                             for count, content in zip(counts, data['content'].values[first])]
+    aggregates['size'] = marker_size + 3 * marker_size * \
+        np.sqrt((counts - 1) / max(1, counts.max() - 1))
+    return aggregates
+
+
+@metric
 def energy_spectrum():
-    conceptarium = st.session_state.conceptarium_json
-    embeddings = [e['embedding'] for e in conceptarium]
-    reducer = PCA(20)
-    embeddings = reducer.fit_transform(embeddings)
-    data = reducer.explained_variance_ratio_
-    return data
+    return semantic_basis()['explained_variance_ratio'][:20]
+
 
+@metric
+def semantic_space_coverage():
+    conceptarium = st.session_state.conceptarium
+    return estimate_coverage(conceptarium['embeddings'], threshold=0.19)
 
-def explored_portion_of_semantic_space():
-    n_probes = 500000
-    hits = 0
 
-    conceptarium = st.session_state.conceptarium_json
-    probes = sample_spherical(n_probes, 512)
-    embeddings = np.array([e['embedding'] for e in conceptarium])
-    similarities = np.dot(probes, embeddings.T)
-    max_similarities = np.max(similarities, axis=1)
-    hits = np.count_nonzero(max_similarities > 0.19)
+def explored_portion_of_semantic_space(coverage=None):
+    if coverage is None:
+        coverage = semantic_space_coverage()
 
-    hitrate = hits / n_probes
+    hitrate = coverage['estimate']
     data = pd.DataFrame(
         [['explored', hitrate], ['unexplored', 1 - hitrate]], columns=['name', 'value'])
     return data
 
 
 def discovery_per_thought(explored_portion):
-    conceptarium = st.session_state.conceptarium_json
-    data = explored_portion / len(conceptarium)
+    conceptarium = st.session_state.conceptarium
+    data = explored_portion / size(conceptarium)
     return data
 
 
+@metric
 def conceptarium_age():
-    conceptarium = st.session_state.conceptarium_json
-    conceptarium = sorted(conceptarium, key=lambda x: x['timestamp'])
-    age = (now() - conceptarium[0]['timestamp']) / (60 * 60 * 24 * 365)
+    conceptarium = st.session_state.conceptarium
+    age = (now() - np.min(conceptarium['timestamps'])) / (60 * 60 * 24 * 365)
     return age
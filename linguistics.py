@@ -0,0 +1,175 @@
+import re
+import os
+import json
+import sqlite3
+import hashlib
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from textblob import TextBlob
+from textblob.en import sentiment as pattern_sentiment
+from util import syllable_count
+from store import size, content, TEXT, CACHE_DIR
+
+
+ANALYZER_VERSION = 1
+FEATURE_CACHE = os.path.join(CACHE_DIR, 'features.sqlite')
+WORKERS = int(os.environ.get('IDEOSCOPE_WORKERS', 1))
+CHUNK_SIZE = 64
+TOKENS = re.compile(r'(?<![^ ])[^ .!?]+(?![^ ])')
+FEATURES = ['length', 'words', 'sentences', 'syllables', 'tokens',
+            'polarity', 'subjectivity', 'assessments']
+
+
+def analyze(text):
+    # one blob serves both the word and sentence counts. sentiment and noun
+    # phrases still tokenize on their own: pattern scores the raw string with
+    # its own tokenizer, and noun phrases are extracted from lowercased text
+    blob = TextBlob(text)
+    score = pattern_sentiment(text)
+    tokens = TOKENS.findall(text)
+    noun_phrases = [e.singularize()
+                    for e in TextBlob(text.lower()).noun_phrases]
+
+    values = [len(text.split(' ')), len(blob.words), len(blob.sentences),
+              sum(syllable_count(e) for e in tokens), len(tokens),
+              score[0], score[1], len(score.assessments)]
+    return values, noun_phrases
+
+
+def analyze_all(texts, n_workers=WORKERS, chunk_size=CHUNK_SIZE):
+    if n_workers > 1 and len(texts) > chunk_size:
+        with ProcessPoolExecutor(n_workers) as executor:
+            return list(executor.map(analyze, texts, chunksize=chunk_size))
+    return [analyze(e) for e in texts]
+
+
+def linguistic_features(store, cache_path=FEATURE_CACHE, n_workers=WORKERS, chunk_size=CHUNK_SIZE):
+    features = {e: np.zeros(size(store)) for e in FEATURES}
+    features['noun_phrases'] = [[] for _ in range(size(store))]
+    features['keys'] = np.zeros(size(store), dtype='<U40')
+
+    text_thoughts = np.flatnonzero(store['modalities'] == TEXT)
+    texts = [content(store, e) for e in text_thoughts]
+    keys = [feature_key(e) for e in texts]
+    cached = load_features(cache_path, keys)
+    missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+    missing = dict(zip(missing, analyze_all(
+        list(missing.values()), n_workers, chunk_size)))
+    cached.update(missing)
+
+    for e_idx, key in zip(text_thoughts, keys):
+        values, noun_phrases = cached[key]
+        for name, value in zip(FEATURES, values):
+            features[name][e_idx] = value
+        features['noun_phrases'][e_idx] = noun_phrases
+        features['keys'][e_idx] = key
+
+    save_features(cache_path, missing)
+    features['text'] = (store['modalities'] == TEXT).astype(float)
+    features['weighted_polarity'] = features['polarity'] * \
+        features['assessments']
+    features['weighted_subjectivity'] = features['subjectivity'] * \
+        features['assessments']
+    return features
+
+
+def fold_interests(store, features, state=None):
+    is_text = store['modalities'] == TEXT
+    if state is not None and (state['analyzer'] != ANALYZER_VERSION or state['digest'] != folded_digest(
+            store, features, is_text & (store['timestamps'] <= state['watermark']))):
+        state = None
+    if state is None:
+        state = {'analyzer': ANALYZER_VERSION,
+                 'watermark': -np.inf, 'keywords': {}}
+
+    keywords = state['keywords']
+    new_thoughts = np.flatnonzero(
+        is_text & (store['timestamps'] > state['watermark']))
+    new_thoughts = new_thoughts[np.argsort(
+        store['timestamps'][new_thoughts], kind='stable')]
+
+    for thought in new_thoughts:
+        noun_phrases = features['noun_phrases'][thought]
+        timestamp = float(store['timestamps'][thought])
+        for noun_phrase in noun_phrases:
+            keywords.setdefault(
+                noun_phrase, [0, 0, timestamp, timestamp])[0] += 1
+        for noun_phrase in dict.fromkeys(noun_phrases):
+            keywords[noun_phrase][1] += 1
+            keywords[noun_phrase][3] = timestamp
+
+    if len(new_thoughts) > 0:
+        state['watermark'] = float(
+            store['timestamps'][new_thoughts[-1]])
+    state['digest'] = folded_digest(
+        store, features, is_text & (store['timestamps'] <= state['watermark']))
+    return state
+
+
+def folded_digest(store, features, folded):
+    # content keys are hashed alongside ids so that edited thoughts are refolded
+    order = np.argsort(store['ids'][folded], kind='stable')
+    digest = hashlib.sha1(store['ids'][folded][order].tobytes())
+    digest.update(features['keys'][folded][order].tobytes())
+    return digest.hexdigest()
+
+
+def load_interests(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_interests(path, state):
+    try:
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        pass
+
+
+def feature_key(text):
+    return hashlib.sha1((str(ANALYZER_VERSION) + '\n' + text).encode()).hexdigest()
+
+
+def load_features(cache_path, keys):
+    cached = {}
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with closing(sqlite3.connect(cache_path)) as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS features (key TEXT PRIMARY KEY, value TEXT)')
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = connection.execute('SELECT key, value FROM features WHERE key IN (%s)' % ','.join(
+                    '?' * len(batch)), batch)
+                cached.update((key, json.loads(value)) for key, value in rows)
+    except (OSError, sqlite3.Error):
+        pass
+    return cached
+
+
+def save_features(cache_path, features):
+    if len(features) == 0:
+        return
+    try:
+        with closing(sqlite3.connect(cache_path)) as connection, connection:
+            connection.executemany('INSERT OR REPLACE INTO features VALUES (?, ?)', [
+                (key, json.dumps(value)) for key, value in features.items()])
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def readability(words, sentences, syllables, tokens):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 0.39 * np.divide(words, sentences) + \
+            11.8 * np.divide(syllables, tokens) - 15.59
+
+
+def weighted_mean(weighted_sums, weights, default=0):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(weights > 0, weighted_sums / weights, default)
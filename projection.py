@@ -0,0 +1,145 @@
+import os
+import numpy as np
+from sklearn.manifold import TSNE
+from sklearn.decomposition import PCA
+
+try:
+    import umap
+except ImportError:
+    umap = None
+
+
+PCA_DIMS = 50
+NEIGHBOURS = 10
+REFIT_DRIFT = 0.1
+
+
+def fit_basis(embeddings, ids, n_dims=PCA_DIMS):
+    n_dims = min(n_dims, *embeddings.shape)
+    reducer = PCA(n_dims, svd_solver='randomized', random_state=0)
+    reducer.fit(embeddings)
+    return {
+        'ids': ids,
+        'mean': reducer.mean_.astype(np.float32),
+        'components': reducer.components_.astype(np.float32)
+    }
+
+
+def basis(embeddings, ids, path, refit_drift=REFIT_DRIFT):
+    fitted = load_basis(path)
+
+    if fitted is None or len(fitted['ids']) == 0 or id_drift(ids, fitted['ids']) > refit_drift:
+        fitted = fit_basis(embeddings, ids)
+        save_basis(path, fitted)
+
+    fitted['explained_variance_ratio'] = explained_variance_ratio(
+        embeddings, fitted)
+    return fitted
+
+
+def reduce(embeddings, basis):
+    return np.dot(embeddings, basis['components'].T) - \
+        np.dot(basis['mean'], basis['components'].T)
+
+
+def explained_variance_ratio(embeddings, basis):
+    total = np.sum(np.var(embeddings, axis=0, dtype=np.float64))
+    return np.var(reduce(embeddings, basis), axis=0, dtype=np.float64) / max(total, 1e-12)
+
+
+def id_drift(ids, previous_ids):
+    changed = len(ids) + len(previous_ids) - 2 * \
+        np.count_nonzero(np.isin(ids, previous_ids))
+    return changed / max(len(ids), 1)
+
+
+def fit_projection(reduced, n_components, backend='tsne'):
+    if backend == 'tsne':
+        reducer = TSNE(n_components, method='barnes_hut', random_state=0)
+    elif backend == 'umap':
+        if umap is None:
+            raise ImportError('the umap backend requires umap-learn')
+        reducer = umap.UMAP(n_components=n_components, random_state=0)
+    else:
+        raise ValueError('unknown projection backend: ' + backend)
+    return reducer.fit_transform(reduced)
+
+
+def project(reduced, ids, n_components, cache_dir, backend='tsne', refit_drift=REFIT_DRIFT):
+    path = os.path.join(cache_dir, '{}-{}d.npz'.format(backend, n_components))
+    layout = load_layout(path)
+
+    if layout is not None and len(layout['ids']) > 0 and layout_drift(ids, layout) <= refit_drift:
+        coordinates, placed = place(reduced, ids, layout)
+        placed += layout['placed']
+    else:
+        coordinates, placed = fit_projection(
+            reduced, n_components, backend), 0
+
+    save_layout(path, ids, coordinates, placed)
+    return coordinates
+
+
+def layout_drift(ids, layout):
+    return layout['placed'] / max(len(ids), 1) + id_drift(ids, layout['ids'])
+
+
+def place(reduced, ids, layout):
+    sorter = np.argsort(layout['ids'])
+    previous = sorter[np.searchsorted(
+        layout['ids'], ids, sorter=sorter) % len(sorter)]
+    known = layout['ids'][previous] == ids
+    new = np.flatnonzero(~known)
+
+    coordinates = np.empty((len(ids), layout['coordinates'].shape[1]))
+    coordinates[known] = layout['coordinates'][previous[known]]
+    anchors = reduced[known]
+    anchor_coordinates = coordinates[known]
+    k = min(NEIGHBOURS, len(anchors))
+
+    for start in range(0, len(new), 256):
+        batch = new[start:start + 256]
+        distances = np.sqrt(np.maximum(0, np.sum(reduced[batch] ** 2, axis=1)[:, None] -
+                                       2 * np.dot(reduced[batch], anchors.T) + np.sum(anchors ** 2, axis=1)))
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        weights = 1 / (np.take_along_axis(distances, nearest, axis=1) + 1e-6)
+        coordinates[batch] = np.einsum('ij,ijk->ik', weights, anchor_coordinates[nearest]) / \
+            np.sum(weights, axis=1, keepdims=True)
+
+    return coordinates, len(new) + len(layout['ids']) - np.count_nonzero(known)
+
+
+def load_layout(path):
+    try:
+        with np.load(path) as layout:
+            return {e: layout[e] for e in ['ids', 'coordinates', 'placed']}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def save_layout(path, ids, coordinates, placed):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path + '.tmp.npz', ids=ids,
+                 coordinates=coordinates, placed=placed)
+        os.replace(path + '.tmp.npz', path)
+    except OSError:
+        pass
+
+
+def load_basis(path):
+    try:
+        with np.load(path) as fitted:
+            return {e: fitted[e] for e in ['ids', 'mean', 'components']}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def save_basis(path, fitted):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path + '.tmp.npz', ids=fitted['ids'],
+                 mean=fitted['mean'], components=fitted['components'])
+        os.replace(path + '.tmp.npz', path)
+    except OSError:
+        pass
@@ -0,0 +1,266 @@
+import numpy as np
+import os
+import re
+import json
+import codecs
+import shutil
+import hashlib
+from time import time as now
+
+
+MODALITIES = ['text', 'image']
+TEXT, IMAGE = 0, 1
+
+DAY = 60 * 60 * 24
+WEEK = DAY * 7
+MONTH = DAY * 30
+
+DECAY = 0.9
+OFFSET = 0.1
+
+CACHE_DIR = os.environ.get('IDEOSCOPE_CACHE', os.path.join(
+    os.path.expanduser('~'), '.cache', 'ideoscope'))
+SNAPSHOT_TTL = 60 * 10
+FULL_SYNC_INTERVAL = DAY
+SEPARATORS = re.compile(r'[\s:\[,]*')
+ROWS = ['embeddings', 'ids', 'timestamps', 'interests', 'modalities', 'norms']
+COLUMNS = ['ids', 'timestamps', 'interests', 'modalities',
+           'offsets', 'norms', 'version', 'fetched_at', 'full_synced_at']
+
+
+def build_store(thoughts):
+    embeddings = np.empty((0, 0), dtype=np.float32)
+    ids, timestamps, interests, modalities, contents = [], [], [], [], []
+
+    for e_idx, e in enumerate(thoughts):
+        embedding = e['embeddings']['text_image']
+        if e_idx == len(embeddings):
+            embeddings = grow(embeddings, len(embedding))
+        embeddings[e_idx] = embedding
+
+        ids += [thought_id(e)]
+        timestamps += [e['timestamp']]
+        interests += [e['interest']]
+        modalities += [MODALITIES.index(e['modality'])]
+        contents += [e['content']]
+
+    n_thoughts = len(ids)
+    embeddings.resize((n_thoughts, embeddings.shape[1]), refcheck=False)
+    offsets = np.zeros(n_thoughts + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in contents], out=offsets[1:])
+
+    store = {
+        'embeddings': embeddings,
+        'ids': np.array(ids, dtype=str),
+        'timestamps': np.array(timestamps, dtype=np.float64),
+        'interests': np.array(interests, dtype=np.float64),
+        'modalities': np.array(modalities, dtype=np.int8),
+        'text': ''.join(contents),
+        'offsets': offsets,
+        'version': new_version(),
+        'fetched_at': np.float64(now())
+    }
+    store['full_synced_at'] = store['fetched_at']
+    store['norms'] = np.linalg.norm(embeddings, axis=1)
+    sort_by_recency(store)
+    store['activations'] = activations(store)
+    return store
+
+
+def grow(embeddings, n_dims):
+    grown = np.empty((max(1024, 2 * len(embeddings)), n_dims), dtype=np.float32)
+    if len(embeddings) > 0:
+        grown[:len(embeddings)] = embeddings
+    return grown
+
+
+def stream_thoughts(chunks, key='authorized_thoughts'):
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+    idx = -1
+
+    while idx < 0:
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise ValueError('response has no "' + key + '": ' + buffer[:200])
+        buffer += text_decoder.decode(chunk)
+        idx = buffer.find('"' + key + '"')
+    buffer = buffer[idx + len(key) + 2:]
+    pos = 0
+
+    while True:
+        pos = SEPARATORS.match(buffer, pos).end()
+        if buffer.startswith(']', pos):
+            return
+        try:
+            thought, pos = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise
+            buffer = buffer[pos:] + text_decoder.decode(chunk)
+            pos = 0
+            continue
+        yield thought
+
+
+def merge_store(store, thoughts):
+    incoming = build_store(thoughts)
+    if size(incoming) == 0:
+        return dict(store, version=incoming['version'], fetched_at=incoming['fetched_at'])
+    if size(store) == 0:
+        return dict(incoming, full_synced_at=store['full_synced_at'])
+
+    kept = select_rows(store, np.flatnonzero(
+        ~np.isin(store['ids'], incoming['ids'])))
+    merged = {e: np.concatenate([kept[e], incoming[e]]) for e in ROWS}
+    merged['text'] = kept['text'] + incoming['text']
+    merged['offsets'] = np.concatenate(
+        [kept['offsets'], kept['offsets'][-1] + incoming['offsets'][1:]])
+    merged['version'] = incoming['version']
+    merged['fetched_at'] = incoming['fetched_at']
+    merged['full_synced_at'] = store['full_synced_at']
+    sort_by_recency(merged)
+    merged['activations'] = activations(merged)
+    return merged
+
+
+def reconcile(store, thoughts):
+    # thoughts is a listing of the whole corpus without embeddings: stored
+    # thoughts missing from it were deleted, and interests are refreshed in
+    # place. an edited content or timestamp needs new embeddings, so None is
+    # returned to ask for a full fetch instead
+    listed = {thought_id(e): e for e in thoughts}
+    rows, interests = [], []
+
+    for e_idx, e in enumerate(store['ids']):
+        thought = listed.get(e)
+        if thought is None:
+            continue
+        if thought['timestamp'] != store['timestamps'][e_idx] or \
+                thought['content'] != content(store, e_idx):
+            return None
+        rows += [e_idx]
+        interests += [thought['interest']]
+
+    interests = np.array(interests, dtype=np.float64)
+    if len(rows) == size(store) and np.array_equal(interests, store['interests']):
+        return store
+
+    reconciled = dict(store, **select_rows(store, np.array(rows, dtype=np.int64)))
+    reconciled['interests'] = interests
+    reconciled['version'] = new_version()
+    reconciled['activations'] = activations(reconciled)
+    return reconciled
+
+
+def select_rows(store, rows):
+    selected = {e: store[e][rows] for e in ROWS}
+    selected['text'] = ''.join(contents(store, rows))
+    selected['offsets'] = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(store['offsets'][rows + 1] - store['offsets'][rows],
+              out=selected['offsets'][1:])
+    return selected
+
+
+def sort_by_recency(store):
+    # rows are kept newest first so that time buckets are contiguous slices
+    order = np.argsort(-store['timestamps'], kind='stable')
+    if not np.all(order == np.arange(len(order))):
+        store.update(select_rows(store, order))
+
+
+def is_sorted_by_recency(store):
+    return bool(np.all(np.diff(store['timestamps']) <= 0))
+
+
+def new_version():
+    return os.urandom(8).hex()
+
+
+def thought_id(thought):
+    return str(thought.get('filename') or thought['timestamp'])
+
+
+def activations(store, reference=None, decay=DECAY, offset=OFFSET):
+    if reference is None:
+        reference = now()
+
+    ages = (np.asarray(reference, dtype=np.float64)[..., None] -
+            store['timestamps']) / DAY
+    return np.log(store['interests'] / (1 - decay)) - decay * np.log(ages + offset)
+
+
+def watermark(store):
+    return np.max(store['timestamps']) if size(store) else 0
+
+
+def size(store):
+    return len(store['timestamps'])
+
+
+def content(store, idx):
+    offsets = store['offsets']
+    return store['text'][offsets[idx]:offsets[idx + 1]]
+
+
+def contents(store, indices=None):
+    if indices is None:
+        indices = range(size(store))
+    elif getattr(indices, 'dtype', None) == bool:
+        indices = np.flatnonzero(indices)
+    return [content(store, e) for e in indices]
+
+
+def buckets(store, period, reference=None):
+    if reference is None:
+        reference = now()
+
+    ages = ((reference - store['timestamps']) / period).astype(int)
+    return np.searchsorted(ages, np.arange(ages[-1] + 2))
+
+
+def snapshot_path(conceptarium_url, access_token):
+    key = hashlib.sha256(
+        (conceptarium_url + '\n' + access_token).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, key[:16])
+
+
+def save_snapshot(store, path):
+    staging = path + '.tmp-' + str(os.getpid())
+    try:
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        np.save(os.path.join(staging, 'embeddings.npy'), store['embeddings'])
+        np.savez(os.path.join(staging, 'columns.npz'),
+                 **{e: store[e] for e in COLUMNS})
+        with open(os.path.join(staging, 'text.txt'), 'w', encoding='utf-8', newline='') as f:
+            f.write(store['text'])
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(staging, path)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_snapshot(path, max_age=None):
+    try:
+        with np.load(os.path.join(path, 'columns.npz')) as columns:
+            store = {e: columns[e] for e in COLUMNS}
+        store['version'] = str(store['version'])
+        if max_age is not None and now() - store['fetched_at'] > max_age:
+            return None
+        store['embeddings'] = np.load(
+            os.path.join(path, 'embeddings.npy'), mmap_mode='r')
+        with open(os.path.join(path, 'text.txt'), encoding='utf-8', newline='') as f:
+            store['text'] = f.read()
+    except (OSError, KeyError, ValueError):
+        return None
+
+    if not is_sorted_by_recency(store):
+        return None
+    store['activations'] = activations(store)
+    return store
@@ -1,5 +1,9 @@
 import numpy as np
 import re
+from functools import lru_cache
+
+
+VOWEL_GROUPS = re.compile('[aeiouy]+')
 
 
 def cos_dist(a, b):
@@ -9,20 +13,56 @@ def cos_dist(a, b):
     return 1 - dot_product / (norm_a * norm_b)
 
 
+@lru_cache(maxsize=2 ** 16)
 def syllable_count(word):
     word = word.lower()
-    count = 0
-    vowels = "aeiouy"
-    if word[0] in vowels:
-        count += 1
-    for index in range(1, len(word)):
-        if word[index] in vowels and word[index - 1] not in vowels:
-            count += 1
-    if word.endswith("e"):
+    count = len(VOWEL_GROUPS.findall(word))
+    if word.endswith('e'):
         count -= 1
-    if count == 0:
-        count += 1
-    return count
+    return max(count, 1)
+
+
+def segment_sums(values, bounds):
+    # np.add.reduceat would cast the whole input to float64 up front, while
+    # np.sum accumulates float32 slices through a small buffer
+    counts = np.diff(bounds)
+    sums = np.zeros((len(counts),) + values.shape[1:])
+    for e_idx in np.flatnonzero(counts > 0):
+        sums[e_idx] = np.sum(
+            values[bounds[e_idx]:bounds[e_idx + 1]], axis=0, dtype=np.float64)
+    return sums
+
+
+def segment_means(embeddings, bounds):
+    counts = np.diff(bounds)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return segment_sums(embeddings, bounds) / counts[:, None]
+
+
+def segment_stats(embeddings, bounds, norms=None):
+    if norms is None:
+        norms = np.linalg.norm(embeddings, axis=1)
+
+    counts = np.diff(bounds)
+    centroids = segment_means(embeddings, bounds)
+    # sum of cosine similarities to the centroid, one slice at a time so that
+    # no normalized copy of the whole matrix is materialized
+    similarities = np.zeros(len(counts))
+    for e_idx in np.flatnonzero(counts > 0):
+        start, end = bounds[e_idx], bounds[e_idx + 1]
+        similarities[e_idx] = np.sum(np.dot(embeddings[start:end], centroids[e_idx].astype(
+            embeddings.dtype)) / norms[start:end])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dispersions = 1 - similarities / \
+            (counts * np.linalg.norm(centroids, axis=1))
+    return centroids, dispersions, counts
+
+
+def consecutive_cos_dist(vectors):
+    dot_products = np.einsum('ij,ij->i', vectors[:-1], vectors[1:])
+    norms = np.linalg.norm(vectors, axis=1)
+    return 1 - dot_products / (norms[:-1] * norms[1:])
 
 
 def sample_spherical(npoints, ndim=3):